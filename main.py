@@ -2,13 +2,24 @@
 
 import sys
 import os
-from PyQt6.QtWidgets import QApplication, QMessageBox
-from ui.main_window import MainWindow
 
 def main():
     # Check if the application is running as root
-    if os.geteuid() != 0:
-        app = QApplication(sys.argv)
+    is_root = os.geteuid() == 0
+    # Only start Qt for the warning when launched from a desktop session without a terminal.
+    # Everywhere else a message on stderr does the job without loading the Qt platform plugin.
+    in_desktop = os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')
+    if not is_root and not (in_desktop and not sys.stdout.isatty()):
+        sys.stderr.write("wifi_gui_util: this application requires root privileges to manage Wi-Fi connections.\n"
+                         "Please run it with 'sudo python3 main.py'.\n")
+        sys.exit(1)
+
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+
+    # The one QApplication of the process, used for the privilege warning or the main window
+    app = QApplication(sys.argv)
+
+    if not is_root:
         msg_box = QMessageBox()
         msg_box.setIcon(QMessageBox.Icon.Warning)
         msg_box.setWindowTitle("Insufficient Privileges")
@@ -17,7 +28,9 @@ def main():
         msg_box.exec()
         sys.exit(1)
     
-    app = QApplication(sys.argv)
+    # The UI is only imported once we know the application can actually run
+    from ui.main_window import MainWindow
+
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
@@ -1,16 +1,125 @@
+"""
+Wi-Fi QR code generation and scanning.
+
+Most of the scan time goes to the decoder itself (zxing-cpp, plus OpenCV's detector
+for still images), which walks the whole raster. Shrinking the image or skipping
+decoder passes pays off; adding more blur/threshold/morphology stages in front of
+the decoder mostly does not. Run with QR_PROFILE=1 to log a per-stage breakdown every
+1000 camera frames, and check it before adding preprocessing to the scan path.
+"""
+
+import collections
+import logging
+import os
+import time
 import qrcode
 import cv2
-from pyzbar import pyzbar
+import numpy as np
 import zxingcpp  # Add zxing-cpp import
-import re
+
+log = logging.getLogger(__name__)
+
+# Characters that must be backslash-escaped in the SSID and password of a Wi-Fi payload
+_WIFI_ESCAPES = str.maketrans({char: '\\' + char for char in '\\;,":'})
+
+# Per-stage timing of the scan path, enabled with QR_PROFILE=1
+_PROFILE = os.environ.get('QR_PROFILE') == '1'
+_PROFILE_REPORT_EVERY = 1000 # frames
+_profile_totals = collections.defaultdict(int)
+_profile_frames = 0
+
+
+def _profile_stage(stage, func, *args):
+    """
+    Calls func(*args), adding its wall time to the stage's total when profiling is enabled.
+
+    Args:
+        stage (str): The name the time is accounted under.
+        func (callable): The stage to run.
+
+    Returns:
+        The return value of func.
+    """
+    if not _PROFILE:
+        return func(*args)
+    start = time.perf_counter_ns()
+    try:
+        return func(*args)
+    finally:
+        _profile_totals[stage] += time.perf_counter_ns() - start
+
+
+def _profile_frame_done():
+    """Counts a scanned frame and logs the stage breakdown every _PROFILE_REPORT_EVERY frames."""
+    global _profile_frames
+    if not _PROFILE:
+        return
+    _profile_frames += 1
+    if _profile_frames % _PROFILE_REPORT_EVERY:
+        return
+    total = sum(_profile_totals.values()) or 1
+    breakdown = ", ".join(
+        f"{stage}: {elapsed / 1e6:.1f} ms ({100 * elapsed / total:.0f}%)"
+        for stage, elapsed in sorted(_profile_totals.items(), key=lambda item: -item[1])
+    )
+    # Logged as a warning so it shows up without configuring logging, it is only on when asked for
+    log.warning("QR scan profile after %d frames: %s", _profile_frames, breakdown)
+
+
+def _split_wifi_fields(payload):
+    """
+    Splits the body of a Wi-Fi QR payload into its KEY:VALUE segments.
+
+    Backslash-escaped characters are resolved, so an escaped ';' stays
+    inside its segment instead of ending it.
+
+    Args:
+        payload (str): The payload with the leading 'WIFI:' removed.
+
+    Returns:
+        list: The unescaped segments.
+    """
+    if '\\' not in payload:
+        return payload.split(';')
+
+    segments = []
+    current = []
+    escaped = False
+    for char in payload:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ';':
+            segments.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    segments.append(''.join(current))
+    return segments
+
 
 class QRHandler:
     """
     Handles QR code generation and scanning.
     """
 
+    # OpenCV detector shared by every scan instead of being rebuilt per call.
+    # The ArUco-based detector (OpenCV 4.8+) finds the finder patterns faster than the legacy one
+    _QR_DETECTOR = cv2.QRCodeDetectorAruco() if hasattr(cv2, 'QRCodeDetectorAruco') else cv2.QRCodeDetector()
+    # QRCode reused for every generated code instead of reallocating it each time
+    _QR_TEMPLATE = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    # Largest side, in pixels, that images are scanned at
+    _MAX_SCAN_DIM = 720
+
     @staticmethod
-    def generate_wifi_qr_code(ssid, password, security="WPA"):
+    def generate_wifi_qr_code(ssid, password, security="WPA", wifi_string=None):
         """
         Generates a QR code for a Wi-Fi network.
 
@@ -18,55 +127,124 @@ class QRHandler:
             ssid (str): The network SSID.
             password (str): The network password.
             security (str, optional): The security type (WPA, WEP, nopass). Defaults to "WPA".
+            wifi_string (str, optional): The payload, if the caller already built it with
+                                         build_wifi_string(). Built from the other arguments otherwise.
 
         Returns:
             qrcode.image.pil.PilImage: The generated QR code image, or None on error.
         """
         try:
-            # Format according to the standard
-            # WIFI:S:<SSID>;T:<WPA|WEP|nopass>;P:<PASSWORD>;H:<true|false|blank>;;
-            # H:false or blank means not hidden. We'll assume not hidden.
-            if not security:
-                security = "nopass"
-            
-            # Normalize security type for better compatibility
-            # Some devices expect specific values like "WPA2" instead of "WPA"
-            if security.upper() == "WPA":
-                # Using "WPA" as it's a common value that works with many devices
-                # If you specifically want to target WPA2, you could use "WPA2"
-                # but "WPA" is generally more universally accepted
-                security_type = "WPA"
-            elif security.upper() == "WEP":
-                security_type = "WEP"
-            else:
-                # For open networks or any other type
-                security_type = security
-            
-            # Construct the WiFi string
-            # For open networks, we can omit the password field or leave it empty
-            if security_type.upper() == "NOPASS":
-                wifi_string = f"WIFI:T:nopass;S:{ssid};;"
-            else:
-                wifi_string = f"WIFI:T:{security_type};S:{ssid};P:{password};;"
-            
-            # Debug output
-            print(f"Generating QR code with string: {wifi_string}")
-            
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(wifi_string)
-            qr.make(fit=True)
-
+            if wifi_string is None:
+                wifi_string = QRHandler.build_wifi_string(ssid, password, security)
+            qr = QRHandler._build_qr(wifi_string)
             img = qr.make_image(fill_color="black", back_color="white")
             return img
         except Exception as e:
-            print(f"Error generating QR code: {e}")
+            log.error("Error generating QR code: %s", e)
+            return None
+
+    @staticmethod
+    def generate_wifi_qr_qpixmap(ssid, password, security="WPA", wifi_string=None):
+        """
+        Generates a QR code for a Wi-Fi network directly as a QPixmap, skipping PIL.
+
+        Args:
+            ssid (str): The network SSID.
+            password (str): The network password.
+            security (str, optional): The security type (WPA, WEP, nopass). Defaults to "WPA".
+            wifi_string (str, optional): The payload, if the caller already built it with
+                                         build_wifi_string(). Built from the other arguments otherwise.
+
+        Returns:
+            PyQt6.QtGui.QPixmap: The generated QR code pixmap, or None on error.
+        """
+        # Imported here so that scanning doesn't depend on Qt
+        from PyQt6.QtGui import QImage, QPixmap, qRgb
+        try:
+            if wifi_string is None:
+                wifi_string = QRHandler.build_wifi_string(ssid, password, security)
+            qr = QRHandler._build_qr(wifi_string)
+            # The matrix already includes the border, True marks a dark module
+            modules = np.asarray(qr.get_matrix(), dtype=np.uint8)
+            box = qr.box_size
+            pixels = np.repeat(np.repeat(modules, box, axis=0), box, axis=1)
+            height, width = pixels.shape
+            # Pack to 1 bit per pixel, most significant bit first as Format_Mono expects.
+            # Bit 0 is a dark module and bit 1 a light one, mapped by the color table below
+            packed = np.packbits(1 - pixels, axis=1)
+            # Hand QImage a bytes object, which it takes on every PyQt6 version. It must
+            # outlive qimage, which wraps it without copying
+            bits = packed.tobytes()
+            qimage = QImage(bits, width, height, packed.strides[0], QImage.Format.Format_Mono)
+            qimage.setColorTable([qRgb(0, 0, 0), qRgb(255, 255, 255)])
+            # fromImage copies the pixels, so the buffer can go away afterwards
+            return QPixmap.fromImage(qimage)
+        except Exception as e:
+            log.error("Error generating QR code: %s", e)
             return None
 
+    @staticmethod
+    def _build_qr(wifi_string):
+        """
+        Builds the QR code for a Wi-Fi payload, ready to be rendered.
+
+        The QRCode object is shared between calls, so the returned code is only
+        valid until the next call.
+
+        Args:
+            wifi_string (str): The payload, as returned by build_wifi_string().
+
+        Returns:
+            qrcode.QRCode: The QR code with its matrix already computed.
+        """
+        log.debug("Generating QR code with string: %s", wifi_string)
+        qr = QRHandler._QR_TEMPLATE
+        qr.clear()
+        qr.version = 1 # fit=True grows from here, don't keep the size of the previous code
+        qr.add_data(wifi_string)
+        qr.make(fit=True)
+        return qr
+
+    @staticmethod
+    def build_wifi_string(ssid, password, security):
+        """
+        Builds the Wi-Fi QR code payload for a network.
+
+        Args:
+            ssid (str): The network SSID.
+            password (str): The network password.
+            security (str): The security type (WPA, WEP, nopass).
+
+        Returns:
+            str: The payload, with special characters in the SSID and password escaped.
+        """
+        # Format according to the standard
+        # WIFI:S:<SSID>;T:<WPA|WEP|nopass>;P:<PASSWORD>;H:<true|false|blank>;;
+        # H:false or blank means not hidden. We'll assume not hidden.
+        if not security:
+            security = "nopass"
+        
+        # Normalize security type for better compatibility
+        # Some devices expect specific values like "WPA2" instead of "WPA"
+        if security.upper() == "WPA":
+            # Using "WPA" as it's a common value that works with many devices
+            # If you specifically want to target WPA2, you could use "WPA2"
+            # but "WPA" is generally more universally accepted
+            security_type = "WPA"
+        elif security.upper() == "WEP":
+            security_type = "WEP"
+        else:
+            # For open networks or any other type
+            security_type = security
+        
+        # Construct the WiFi string
+        # For open networks, we can omit the password field or leave it empty
+        ssid = ssid.translate(_WIFI_ESCAPES)
+        if security_type.upper() == "NOPASS":
+            return f"WIFI:T:nopass;S:{ssid};;"
+        password = password.translate(_WIFI_ESCAPES)
+        return f"WIFI:T:{security_type};S:{ssid};P:{password};;"
+
     @staticmethod
     def scan_qr_from_image_data(image_data):
         """
@@ -80,84 +258,39 @@ class QRHandler:
                           Wi-Fi QR code is found, otherwise None.
         """
         try:
-            print("Attempting to decode image data with zxing-cpp...")
-            
-            # Convert BGR to RGB for zxing-cpp if needed
-            if len(image_data.shape) == 3 and image_data.shape[2] == 3:
-                image_rgb = cv2.cvtColor(image_data, cv2.COLOR_BGR2RGB)
-                print(f"Image converted to RGB. Shape: {image_rgb.shape}, dtype: {image_rgb.dtype}")
-            else:
-                image_rgb = image_data
-                print(f"Image is already in the correct format. Shape: {image_rgb.shape}, dtype: {image_rgb.dtype}")
-            
-            # Try to decode with zxing-cpp
-            results = zxingcpp.read_barcode(image_rgb)
-            print(f"zxing-cpp returned results: {results}")
-            
-            if results and results.text:
-                data = results.text
-                print(f"Decoded data with zxing-cpp: {data}")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
+            small = _profile_stage('resize', QRHandler._downscale, image_data)
+            gray = QRHandler._to_gray(small)
+
+            log.debug("Attempting to decode image data with zxing-cpp...")
+            parsed_data = QRHandler._read_wifi_qr_zxing(gray)
+            if parsed_data:
+                return parsed_data
+
+            # A code that is small within a large photo can lose too much detail when
+            # downscaled, so give zxing-cpp the full-resolution image before falling back
+            if small is not image_data:
+                log.debug("Retrying zxing-cpp on the full-resolution image...")
+                parsed_data = QRHandler._read_wifi_qr_zxing(QRHandler._to_gray(image_data))
                 if parsed_data:
-                    print("Successfully parsed Wi-Fi QR code data with zxing-cpp")
                     return parsed_data
-            else:
-                print("No QR code detected with zxing-cpp")
-                
+
             # If zxing-cpp fails, try OpenCV QRCodeDetector as a fallback
-            print("zxing-cpp failed. Trying OpenCV QRCodeDetector...")
-            qrDecoder = cv2.QRCodeDetector()
-            data, bbox, rectifiedImage = qrDecoder.detectAndDecode(image_data)
+            log.debug("zxing-cpp failed. Trying OpenCV QRCodeDetector...")
+            data, bbox, rectifiedImage = _profile_stage('QRCodeDetector', QRHandler._QR_DETECTOR.detectAndDecode, gray)
             
             if data:
-                print(f"Decoded data with OpenCV QRCodeDetector: {data}")
+                log.debug("Decoded data with OpenCV QRCodeDetector: %s", data)
                 parsed_data = QRHandler._parse_wifi_qr_data(data)
                 if parsed_data:
-                    print("Successfully parsed Wi-Fi QR code data with OpenCV QRCodeDetector")
+                    log.debug("Successfully parsed Wi-Fi QR code data with OpenCV QRCodeDetector")
                     return parsed_data
             else:
-                print("No QR code detected with OpenCV QRCodeDetector")
+                log.debug("No QR code detected with OpenCV QRCodeDetector")
                 
-            # If OpenCV's detector fails, try pyzbar as a fallback
-            print("OpenCV QRCodeDetector failed. Trying pyzbar as fallback...")
-            decoded_objects = pyzbar.decode(image_data)
-            print(f"Found {len(decoded_objects)} QR codes with pyzbar")
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                print(f"Decoded data with pyzbar: {data}")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    print("Successfully parsed Wi-Fi QR code data with pyzbar")
-                    return parsed_data
-            
-            # If that fails, try some preprocessing techniques with pyzbar
-            print("pyzbar also failed. Trying preprocessing techniques with pyzbar...")
-            
-            # Convert to grayscale if needed
-            if len(image_data.shape) == 3:
-                gray = cv2.cvtColor(image_data, cv2.COLOR_BGR2GRAY)
-                print(f"Image converted to grayscale. Shape: {gray.shape}, dtype: {gray.dtype}")
-            else:
-                gray = image_data
-                print(f"Image is already grayscale. Shape: {gray.shape}, dtype: {gray.dtype}")
-            
-            # Try decoding grayscale
-            decoded_objects = pyzbar.decode(gray)
-            print(f"Found {len(decoded_objects)} QR codes in grayscale image")
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                print(f"Decoded data from grayscale image: {data}")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    print("Successfully parsed Wi-Fi QR code data from grayscale image")
-                    return parsed_data
-            
-            print("No valid QR code found after all attempts")
+            log.debug("No valid QR code found after all attempts")
             return None # No valid QR code found after all attempts
         except Exception as e:
-            print(f"Error scanning QR code from image data: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error scanning QR code from image data: %s", e)
             return None
 
     @staticmethod
@@ -173,26 +306,24 @@ class QRHandler:
                           Wi-Fi QR code is found, otherwise None.
         """
         try:
-            print(f"Attempting to load image from {image_path}")
+            log.debug("Attempting to load image from %s", image_path)
             
             # Try to decode with zxing-cpp first (most robust)
-            print("Attempting to decode with zxing-cpp...")
+            log.debug("Attempting to decode with zxing-cpp...")
             
-            # Read image with OpenCV
-            image = cv2.imread(image_path)
+            # Read image with OpenCV, straight to grayscale since none of the decoders need color
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             if image is None:
-                print(f"Error: Could not load image from {image_path}")
+                log.error("Could not load image from %s", image_path)
                 return None
             
-            print(f"Image loaded successfully. Shape: {image.shape}, dtype: {image.dtype}")
+            log.debug("Image loaded successfully. Shape: %s, dtype: %s", image.shape, image.dtype)
             
             # Use the new method for scanning image data
             return QRHandler.scan_qr_from_image_data(image)
             
         except Exception as e:
-            print(f"Error scanning QR code from image: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error scanning QR code from image: %s", e)
             return None
 
     @staticmethod
@@ -208,107 +339,86 @@ class QRHandler:
                           Wi-Fi QR code is found, otherwise None.
         """
         try:
-            # Try to decode with zxing-cpp first (most robust)
-            # Convert BGR to RGB for zxing-cpp
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = zxingcpp.read_barcode(frame_rgb)
-            
-            if results and results.text:
-                data = results.text
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-                    
-            # If zxing-cpp fails, try OpenCV QRCodeDetector as a fallback
-            qrDecoder = cv2.QRCodeDetector()
-            data, bbox, rectifiedImage = qrDecoder.detectAndDecode(frame)
-            
-            if data:
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-                    
-            # If OpenCV's detector fails, try pyzbar as a fallback
-            # Try to decode the original frame
-            decoded_objects = pyzbar.decode(frame)
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-                    
-            # If that fails, try some preprocessing techniques
-            # Convert to grayscale if it's not already
+            # Work on a bounded resolution, decoding cost scales with pixel count
+            frame = _profile_stage('resize', QRHandler._downscale, frame)
+
             if len(frame.shape) == 3:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                gray = _profile_stage('cvtColor', cv2.cvtColor, frame, cv2.COLOR_BGR2GRAY)
             else:
                 gray = frame
-            
-            # Try decoding grayscale
-            decoded_objects = pyzbar.decode(gray)
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-            
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Try decoding blurred image
-            decoded_objects = pyzbar.decode(blurred)
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-            
-            # Apply threshold to get binary image
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # Try decoding thresholded image
-            decoded_objects = pyzbar.decode(thresh)
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-            
-            # Try morphological operations to enhance QR code features
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            # Try decoding morphologically enhanced image
-            decoded_objects = pyzbar.decode(morph)
-            for obj in decoded_objects:
-                data = obj.data.decode("utf-8")
-                parsed_data = QRHandler._parse_wifi_qr_data(data)
-                if parsed_data:
-                    return parsed_data
-            
-            # Try resizing the frame to different scales
-            for scale in [0.5, 1.5, 2.0]:
-                width = int(frame.shape[1] * scale)
-                height = int(frame.shape[0] * scale)
-                dim = (width, height)
-                
-                # Resize frame
-                resized = cv2.resize(frame, dim, interpolation=cv2.INTER_AREA)
-                
-                # Try decoding resized frame
-                decoded_objects = pyzbar.decode(resized)
-                for obj in decoded_objects:
-                    data = obj.data.decode("utf-8")
-                    parsed_data = QRHandler._parse_wifi_qr_data(data)
-                    if parsed_data:
-                        return parsed_data
-            
-            return None # No valid QR code found after all attempts
+
+            # zxing-cpp does its own binarization, multi-scale and rotation handling,
+            # so a single pass over the grayscale frame is all it needs
+            results = _profile_stage('zxingcpp.read_barcode', zxingcpp.read_barcode, gray)
+            _profile_frame_done()
+            if results and results.format == zxingcpp.BarcodeFormat.QRCode:
+                return QRHandler._parse_wifi_qr_data(results.text)
+            return None
         except Exception as e:
-            # It's common for frames to not contain a decodable QR code, so logging every error might be noisy.
-            # print(f"Error scanning QR code from frame: {e}") 
+            # It's common for frames to not contain a decodable QR code, so only log this at debug level.
+            log.debug("Error scanning QR code from frame: %s", e)
             return None
 
+    @staticmethod
+    def _to_gray(image):
+        """
+        Converts an image to grayscale, zxing-cpp works on luminance.
+
+        Args:
+            image (numpy.ndarray): A BGR or grayscale image. Images loaded by
+                                   scan_qr_from_image are already grayscale.
+
+        Returns:
+            numpy.ndarray: The grayscale image.
+        """
+        if len(image.shape) == 3:
+            gray = _profile_stage('cvtColor', cv2.cvtColor, image, cv2.COLOR_BGR2GRAY)
+            log.debug("Image converted to grayscale. Shape: %s, dtype: %s", gray.shape, gray.dtype)
+            return gray
+        log.debug("Image is already grayscale. Shape: %s, dtype: %s", image.shape, image.dtype)
+        return image
+
+    @staticmethod
+    def _read_wifi_qr_zxing(gray):
+        """
+        Decodes a Wi-Fi QR code from a grayscale image with zxing-cpp.
+
+        Args:
+            gray (numpy.ndarray): The grayscale image.
+
+        Returns:
+            dict or None: The parsed Wi-Fi data, or None if no Wi-Fi QR code was decoded.
+        """
+        results = _profile_stage('zxingcpp.read_barcode', zxingcpp.read_barcode, gray)
+        log.debug("zxing-cpp returned results: %s", results)
+
+        # Check the format first, .text only needs to be built for an actual QR code
+        if results and results.format == zxingcpp.BarcodeFormat.QRCode:
+            data = results.text
+            log.debug("Decoded data with zxing-cpp: %s", data)
+            parsed_data = QRHandler._parse_wifi_qr_data(data)
+            if parsed_data:
+                log.debug("Successfully parsed Wi-Fi QR code data with zxing-cpp")
+            return parsed_data
+        log.debug("No QR code detected with zxing-cpp")
+        return None
+
+    @staticmethod
+    def _downscale(image):
+        """
+        Shrinks an image so that its largest side is at most _MAX_SCAN_DIM pixels.
+
+        Args:
+            image (numpy.ndarray): The image to shrink.
+
+        Returns:
+            numpy.ndarray: The resized image, or the original one if it is already small enough.
+        """
+        scale = QRHandler._MAX_SCAN_DIM / max(image.shape[:2])
+        if scale >= 1:
+            return image
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
     @staticmethod
     def _parse_wifi_qr_data(data):
         """
@@ -321,49 +431,38 @@ class QRHandler:
             dict or None: A dictionary with 'ssid', 'password', 'security' if the data
                           conforms to the Wi-Fi QR code format, otherwise None.
         """
-        # Match the Wi-Fi QR code format
         # The standard format is: WIFI:S:<SSID>;T:<WPA|WEP|nopass>;P:<PASSWORD>;H:<true|false|blank>;;
-        # But the fields can be in different orders, so we need to be flexible
-        # Let's extract each field separately
-        
-        # Extract SSID (S:)
-        ssid_match = re.search(r'S:([^;]*);', data)
-        ssid = ssid_match.group(1) if ssid_match else None
-        
-        # Extract security type (T:)
-        security_match = re.search(r'T:([^;]*);', data)
-        security = security_match.group(1) if security_match else None
-        
-        # Extract password (P:)
-        password_match = re.search(r'P:([^;]*);', data)
-        password = password_match.group(1) if password_match else ""
-        
-        # Extract hidden flag (H:) if present
-        hidden_match = re.search(r'H:([^;]*);', data)
-        hidden = hidden_match.group(1) if hidden_match else "false"
-        
-        if ssid and security:
-            # Normalize security type
-            if security.upper() in ["WPA2", "WPA3"]:
-                security = "WPA"  # Treat WPA2/WPA3 as WPA for simplicity in our app
-            elif security.upper() == "NOPASS":
-                password = ""  # No password for nopass
-                
-            return {
-                'ssid': ssid,
-                'password': password,
-                'security': security
-            }
-        
-        # Handle 'nopass' networks or other variations if needed
-        # Example: WIFI:T:nopass;S:MyNetwork;;
-        match_nopass = re.search(r'WIFI:T:(?P<security>nopass);S:(?P<ssid>[^;]*);', data)
-        if match_nopass:
-             return {
-                'ssid': match_nopass.group('ssid'),
-                'password': '', # No password for nopass
-                'security': match_nopass.group('security')
-            }
-        
-        # If it doesn't match the known Wi-Fi format, return None
-        return None
\ No newline at end of file
+        # The fields can be in different orders, so split the payload once into
+        # KEY:VALUE segments and look the fields up by key
+
+        # Anything that isn't a Wi-Fi payload (URLs, vCards, text, missing data)
+        # is rejected up front
+        if not isinstance(data, str) or not data.startswith('WIFI:'):
+            return None
+
+        fields = {}
+        for segment in _split_wifi_fields(data[5:]):
+            key, sep, value = segment.partition(':')
+            if sep:
+                fields[key] = value
+
+        ssid = fields.get('S')
+        security = fields.get('T')
+        if not ssid or not security:
+            # If it doesn't match the known Wi-Fi format, return None
+            return None
+
+        # Normalize security type
+        if security.upper() in ["WPA2", "WPA3"]:
+            security = "WPA"  # Treat WPA2/WPA3 as WPA for simplicity in our app
+
+        if security.upper() == "NOPASS":
+            password = ""  # No password for nopass
+        else:
+            password = fields.get('P', "")
+
+        return {
+            'ssid': ssid,
+            'password': password,
+            'security': security
+        }
@@ -9,17 +9,14 @@ def test_qr_reading(image_path):
     print(f"Testing QR code reading for image: {image_path}")
     
     try:
-        # Read image with OpenCV
-        image = cv2.imread(image_path)
+        # Read image with OpenCV, straight to grayscale
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
         if image is None:
             print("ERROR: Could not load image")
             return False
         
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Try to decode with zxing-cpp
-        results = zxingcpp.read_barcode(image_rgb)
+        # Try to decode with zxing-cpp, which works on the luminance channel directly
+        results = zxingcpp.read_barcode(image)
         
         if results and results.text:
             print(f"SUCCESS: QR code detected!")
@@ -1,121 +1,143 @@
 #!/usr/bin/env python3
 
-import zxingcpp
-import cv2
-from pyzbar import pyzbar
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def test_zxing_cpp(image_path):
-    \"\"\"Test QR code reading with zxing-cpp\"\"\"
-    print(\"Testing with zxing-cpp...\")
+# QR modules only need a few pixels each, so detection first runs on a copy no larger than this
+MAX_SCAN_DIM = 1024
+
+def scan_candidates(image):
+    """Yield the image downscaled to MAX_SCAN_DIM first (if it is larger), then at full resolution"""
+    import cv2
+    h, w = image.shape[:2]
+    scale = MAX_SCAN_DIM / max(h, w)
+    if scale < 1.0:
+        yield cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    yield image
+
+def test_zxing_cpp(image):
+    """Test QR code reading with zxing-cpp on a grayscale image"""
+    print("Testing with zxing-cpp...")
     try:
-        # Read image with OpenCV and convert to RGB for zxing-cpp
-        image = cv2.imread(image_path)
-        if image is None:
-            print(\"  FAILED: Could not load image\")
-            return None
-        
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Try to decode with zxing-cpp
-        results = zxingcpp.read_barcode(image_rgb)
+        # Decoder libraries are imported per test, so a bad image path exits before loading any of them
+        import zxingcpp
+        # Try to decode with zxing-cpp, which works on the luminance channel directly
+        for candidate in scan_candidates(image):
+            # Only look for QR codes, in the upright orientation.
+            # try_invert/try_harder aren't passed: not every zxing-cpp release accepts them
+            results = zxingcpp.read_barcode(candidate, formats=zxingcpp.BarcodeFormat.QRCode, try_rotate=False)
+            if results and results.text:
+                break
         
         if results and results.text:
-            print(f\"  SUCCESS: {results.text}\")
+            print(f"  SUCCESS: {results.text}")
             return results.text
         else:
-            print(\"  FAILED: No QR code detected\")
+            print("  FAILED: No QR code detected")
             return None
     except Exception as e:
-        print(f\"  ERROR: {e}\")
+        print(f"  ERROR: {e}")
         return None
 
-def test_opencv(image_path):
-    \"\"\"Test QR code reading with OpenCV\"\"\"
-    print(\"Testing with OpenCV...\")
+def test_opencv(image):
+    """Test QR code reading with OpenCV on a BGR image"""
+    print("Testing with OpenCV...")
     try:
-        image = cv2.imread(image_path)
-        if image is None:
-            print(\"  FAILED: Could not load image\")
-            return None
-            
+        import cv2
         qrDecoder = cv2.QRCodeDetector()
-        data, bbox, rectifiedImage = qrDecoder.detectAndDecode(image)
+        for candidate in scan_candidates(image):
+            data, bbox, rectifiedImage = qrDecoder.detectAndDecode(candidate)
+            if data:
+                break
         
         if data:
-            print(f\"  SUCCESS: {data}\")
+            print(f"  SUCCESS: {data}")
             return data
         else:
-            print(\"  FAILED: No QR code detected\")
+            print("  FAILED: No QR code detected")
             return None
     except Exception as e:
-        print(f\"  ERROR: {e}\")
+        print(f"  ERROR: {e}")
         return None
 
-def test_pyzbar(image_path):
-    \"\"\"Test QR code reading with pyzbar\"\"\"
-    print(\"Testing with pyzbar...\")
+def test_pyzbar(image):
+    """Test QR code reading with pyzbar on a grayscale image"""
+    print("Testing with pyzbar...")
     try:
-        image = cv2.imread(image_path)
-        if image is None:
-            print(\"  FAILED: Could not load image\")
-            return None
-            
-        decoded_objects = pyzbar.decode(image)
+        from pyzbar import pyzbar
+        for candidate in scan_candidates(image):
+            decoded_objects = pyzbar.decode(candidate)
+            if decoded_objects:
+                break
         if decoded_objects:
-            data = decoded_objects[0].data.decode(\"utf-8\")
-            print(f\"  SUCCESS: {data}\")
+            data = decoded_objects[0].data.decode("utf-8")
+            print(f"  SUCCESS: {data}")
             return data
         else:
-            print(\"  FAILED: No QR code detected\")
+            print("  FAILED: No QR code detected")
             return None
     except Exception as e:
-        print(f\"  ERROR: {e}\")
+        print(f"  ERROR: {e}")
         return None
 
 def main():
-    if len(sys.argv) != 2:
-        print(\"Usage: python3 test_qr_comprehensive.py <image_path>\")
+    # --all runs every library even when zxing-cpp already decoded the code
+    args = sys.argv[1:]
+    run_all = '--all' in args
+    paths = [arg for arg in args if arg != '--all']
+    if len(paths) != 1:
+        print("Usage: python3 test_qr_comprehensive.py [--all] <image_path>")
         sys.exit(1)
     
-    image_path = sys.argv[1]
+    image_path = paths[0]
     
     if not os.path.exists(image_path):
-        print(f\"Error: File {image_path} does not exist\")
+        print(f"Error: File {image_path} does not exist")
         sys.exit(1)
     
-    print(f\"Testing QR code reading for image: {image_path}\")
-    print(f\"File size: {os.path.getsize(image_path)} bytes\")
+    print(f"Testing QR code reading for image: {image_path}")
+    print(f"File size: {os.path.getsize(image_path)} bytes")
     print()
     
+    # Decode the file once and share the pixels: OpenCV gets the BGR image, the others grayscale
+    import cv2
+    raw = cv2.imread(image_path)
+    if raw is None:
+        print("Error: Could not load image")
+        sys.exit(1)
+    gray = cv2.cvtColor(raw, cv2.COLOR_BGR2GRAY)
+    
     # Test with different libraries
+    tests = (('zxing-cpp', test_zxing_cpp, gray), ('OpenCV', test_opencv, raw), ('pyzbar', test_pyzbar, gray))
     results = {}
-    
-    results['zxing-cpp'] = test_zxing_cpp(image_path)
-    print()
-    
-    results['OpenCV'] = test_opencv(image_path)
-    print()
-    
-    results['pyzbar'] = test_pyzbar(image_path)
+    if not run_all:
+        # zxing-cpp is the fastest and most reliable: if it reads the code, skip the others
+        results['zxing-cpp'] = test_zxing_cpp(gray)
+        if results['zxing-cpp']:
+            print("Skipping the other libraries (use --all to run them)")
+    if run_all or not results['zxing-cpp']:
+        # Run the remaining libraries concurrently: their decoders release the GIL
+        remaining = [test for test in tests if test[0] not in results]
+        with ThreadPoolExecutor(max_workers=len(remaining)) as executor:
+            futures = {name: executor.submit(test, image) for name, test, image in remaining}
+            results.update((name, future.result()) for name, future in futures.items())
     print()
     
     # Summary
-    print(\"Summary:\")
+    print("Summary:")
     for library, result in results.items():
-        status = \"SUCCESS\" if result else \"FAILED\"
-        print(f\"  {library}: {status}\")
+        status = "SUCCESS" if result else "FAILED"
+        print(f"  {library}: {status}")
     
     # Check if any library succeeded
     success_count = sum(1 for result in results.values() if result)
     if success_count > 0:
-        print(f\"\\nAt least one library successfully read the QR code ({success_count}/{len(results)})\")
+        print(f"\nAt least one library successfully read the QR code ({success_count}/{len(results)})")
         sys.exit(0)
     else:
-        print(f\"\\nAll libraries failed to read the QR code\")
+        print(f"\nAll libraries failed to read the QR code")
         sys.exit(1)
 
-if __name__ == \"__main__\":
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -38,7 +38,8 @@ class MainWindow(QMainWindow):
         self._create_status_bar()
         
         # Connect signals from views to main window slots for coordination
-        self.network_list_view.qr_generated.connect(self.display_qr_code)
+        # Queued so display_qr returns and paints before the main window reacts
+        self.network_list_view.qr_generated.connect(self.display_qr_code, Qt.ConnectionType.QueuedConnection)
         self.qr_scanner_view.qr_scanned.connect(self.handle_scanned_qr)
         self.qr_scanner_view.scan_finished.connect(self.show_network_list_view)
 
@@ -86,7 +87,7 @@ class MainWindow(QMainWindow):
         """Switch back to the network list view."""
         self.stacked_widget.setCurrentWidget(self.network_list_view)
 
-    def display_qr_code(self, qr_image):
+    def display_qr_code(self, qr_pixmap):
         """Display a generated QR code. This can be extended to show it in a dialog or the details panel."""
         # For now, just show a message. In a full implementation, 
         # this would update the NetworkListView's details panel or open a dialog.
@@ -96,10 +97,7 @@ class MainWindow(QMainWindow):
         # dialog = QDialog(self)
         # dialog.setWindowTitle("Generated QR Code")
         # label = QLabel()
-        # # Convert PIL Image to QPixmap (requires conversion)
-        # # This is a placeholder for the actual conversion logic
-        # # pixmap = self._pil_image_to_qpixmap(qr_image) 
-        # # label.setPixmap(pixmap)
+        # label.setPixmap(qr_pixmap)
         # layout = QVBoxLayout()
         # layout.addWidget(label)
         # dialog.setLayout(layout)
@@ -151,6 +149,11 @@ class MainWindow(QMainWindow):
             self.status_bar.showMessage(f"Save profile failed: {message}", 5000)
             QMessageBox.critical(self, "Save Profile Error", message)
 
+    def closeEvent(self, event):
+        """Stop and close the camera before the window goes away."""
+        self.qr_scanner_view.release_camera()
+        super().closeEvent(event)
+
     def show_about(self):
         """Show an about dialog."""
         QMessageBox.about(self, "About Wi-Fi QR Manager",
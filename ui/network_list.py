@@ -1,21 +1,137 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel, QAbstractItemView, QHeaderView
-from PyQt6.QtCore import pyqtSignal, Qt
-from PyQt6.QtGui import QPixmap, QImage
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QPushButton, QLabel, QAbstractItemView, QHeaderView, QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication, QToolTip
+from PyQt6.QtCore import pyqtSignal, Qt, QAbstractTableModel, QModelIndex, QEvent, QRect, QSize
+from collections import OrderedDict
 import io
+from pathlib import Path
 from wifi_manager import WifiManager
-from qr_handler import QRHandler
+
+class NetworkTableModel(QAbstractTableModel):
+    """
+    Table model over the list of saved connections.
+    The full connection dict is available through Qt.ItemDataRole.UserRole.
+    """
+    HEADERS = ["SSID", "Security", "Status", "Actions"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connections = []
+
+    def set_connections(self, connections):
+        """Replace the connections shown by the table with a single model reset."""
+        self.beginResetModel()
+        self.connections = connections
+        self.endResetModel()
+
+    def connection_at(self, row):
+        """Return the connection dict for a row, or None if the row doesn't exist."""
+        if 0 <= row < len(self.connections):
+            return self.connections[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.connections)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        conn = self.connections[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return conn
+        if role == Qt.ItemDataRole.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return conn['ssid']
+            if column == 1:
+                return conn['security_label']
+            if column == 2:
+                # Status is tricky to get dynamically without more nmcli calls
+                # For simplicity, we'll leave it blank or assume disconnected
+                # A more advanced version could check `nmcli connection show --active`
+                return "Unknown"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        # Row numbers in the vertical header, as the table widget used to show
+        return super().headerData(section, orientation, role)
+
+
+class NetworkActionsDelegate(QStyledItemDelegate):
+    """
+    Paints the per-row action buttons of the Actions column and turns clicks on them into signals,
+    so the table doesn't need a widget per row.
+    """
+    copy_requested = pyqtSignal(int) # Row whose copy button was clicked
+    qr_requested = pyqtSignal(int) # Row whose QR button was clicked
+
+    _BUTTON_SIZE = 30
+    _BUTTON_SPACING = 4
+    # (label, tooltip) for each button, left to right
+    _BUTTONS = (("📋", "Copy Password"), ("🧾", "Generate QR Code"))
+
+    def _button_rects(self, cell_rect):
+        """Return the rectangles of the action buttons within a cell."""
+        top = cell_rect.top() + (cell_rect.height() - self._BUTTON_SIZE) // 2
+        return [
+            QRect(cell_rect.left() + i * (self._BUTTON_SIZE + self._BUTTON_SPACING), top, self._BUTTON_SIZE, self._BUTTON_SIZE)
+            for i in range(len(self._BUTTONS))
+        ]
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index) # Background and selection highlight
+        style = option.widget.style() if option.widget else QApplication.style()
+        for rect, (label, _) in zip(self._button_rects(option.rect), self._BUTTONS):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        count = len(self._BUTTONS)
+        return QSize(count * self._BUTTON_SIZE + (count - 1) * self._BUTTON_SPACING, self._BUTTON_SIZE)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            pos = event.position().toPoint()
+            signals = (self.copy_requested, self.qr_requested)
+            for rect, signal in zip(self._button_rects(option.rect), signals):
+                if rect.contains(pos):
+                    signal.emit(index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.Type.ToolTip:
+            for rect, (_, tooltip) in zip(self._button_rects(option.rect), self._BUTTONS):
+                if rect.contains(event.pos()):
+                    QToolTip.showText(event.globalPos(), tooltip, view)
+                    return True
+        return super().helpEvent(event, view, option, index)
+
 
 class NetworkListView(QWidget):
     """
     Widget to display the list of saved networks and their details/QR codes.
     Emits a signal when a QR code is generated.
     """
-    qr_generated = pyqtSignal(object) # Signal carrying the PIL Image object
+    qr_generated = pyqtSignal(object) # Signal carrying the QPixmap of the QR code
+
+    # Number of generated QR codes (and scaled pixmaps) kept for repeated clicks
+    _QR_CACHE_SIZE = 32
 
     def __init__(self):
         super().__init__()
         self.connections = []
-        self.current_qr_image = None
+        self.current_qr_pixmap = None
+        self.current_wifi_string = None # Payload of the current QR code, reused when saving it as text
+        # LRU caches keyed by (ssid, password, security), the pixmap one also by label size
+        self._qr_cache = OrderedDict()
+        self._qr_pixmap_cache = OrderedDict()
         self._setup_ui()
         self.refresh_connections() # Load connections on init
 
@@ -24,8 +140,9 @@ class NetworkListView(QWidget):
         layout = QVBoxLayout(self)
 
         # --- Top Panel: Network List ---
-        self.network_table = QTableWidget(0, 4) # 0 rows, 4 columns
-        self.network_table.setHorizontalHeaderLabels(["SSID", "Security", "Status", "Actions"])
+        self.network_model = NetworkTableModel(self)
+        self.network_table = QTableView()
+        self.network_table.setModel(self.network_model)
         self.network_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.network_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.network_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
@@ -37,8 +154,14 @@ class NetworkListView(QWidget):
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents) # Status
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents) # Actions
         
+        # Action buttons are painted by a delegate rather than being real widgets
+        self.actions_delegate = NetworkActionsDelegate(self.network_table)
+        self.actions_delegate.copy_requested.connect(self._on_row_copy)
+        self.actions_delegate.qr_requested.connect(self._on_row_qr)
+        self.network_table.setItemDelegateForColumn(3, self.actions_delegate)
+        
         # Connect selection change
-        self.network_table.currentCellChanged.connect(self.on_network_selected)
+        self.network_table.selectionModel().currentRowChanged.connect(self.on_network_selected)
         
         layout.addWidget(self.network_table)
 
@@ -96,69 +219,45 @@ class NetworkListView(QWidget):
     def refresh_connections(self):
         """Refresh the list of saved connections."""
         self.connections = WifiManager.get_saved_connections()
-        self._populate_network_table()
+        # Derive the display/QR fields once per refresh instead of on every use
+        for conn in self.connections:
+            password = conn['password']
+            # Assume WPA/WPA2 if there's a password, otherwise open
+            conn['security'] = "WPA" if password else "nopass"
+            conn['security_label'] = "WPA/WPA2" if password else "Open"
+            conn['masked_password'] = '*' * len(password) if password else "(None)"
+        self.network_model.set_connections(self.connections)
         self.info_label.setText("Network list refreshed. Select a network.")
         # Clear details/QR display
         self.show_network_details() # This will reset the bottom panel
 
-    def _populate_network_table(self):
-        """Populate the network table with data."""
-        self.network_table.setRowCount(len(self.connections))
-        for row, conn in enumerate(self.connections):
-            ssid_item = QTableWidgetItem(conn['ssid'])
-            ssid_item.setData(Qt.ItemDataRole.UserRole, conn) # Store full data in UserRole
-            self.network_table.setItem(row, 0, ssid_item)
-            
-            security_item = QTableWidgetItem("WPA/WPA2" if conn['password'] else "Open")
-            self.network_table.setItem(row, 1, security_item)
-            
-            # Status is tricky to get dynamically without more nmcli calls
-            # For simplicity, we'll leave it blank or assume disconnected
-            # A more advanced version could check `nmcli connection show --active`
-            status_item = QTableWidgetItem("Unknown") 
-            self.network_table.setItem(row, 2, status_item)
-            
-            # Actions column with buttons
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            copy_btn = QPushButton("📋")
-            copy_btn.setFixedSize(30, 30)
-            copy_btn.setToolTip("Copy Password")
-            # Using lambda with default argument to capture 'conn' at definition time
-            copy_btn.clicked.connect(lambda checked, c=conn: self.copy_password(c))
-            actions_layout.addWidget(copy_btn)
-            
-            qr_btn = QPushButton("🧾")
-            qr_btn.setFixedSize(30, 30)
-            qr_btn.setToolTip("Generate QR Code")
-            qr_btn.clicked.connect(lambda checked, c=conn: self.generate_qr_code(c))
-            actions_layout.addWidget(qr_btn)
-            
-            actions_widget.setLayout(actions_layout)
-            self.network_table.setCellWidget(row, 3, actions_widget)
+    def _on_row_copy(self, row):
+        """Copy the password of the row whose copy button was clicked."""
+        conn_data = self.network_model.connection_at(row)
+        if conn_data:
+            self.copy_password(conn_data)
 
-    def on_network_selected(self, current_row, current_column, previous_row, previous_column):
+    def _on_row_qr(self, row):
+        """Generate a QR code for the row whose QR button was clicked."""
+        conn_data = self.network_model.connection_at(row)
+        if conn_data:
+            self.generate_qr_code(conn_data)
+
+    def on_network_selected(self, current, previous):
         """Handle selection change in the network table."""
-        if current_row >= 0:
-            item = self.network_table.item(current_row, 0)
-            if item:
-                conn_data = item.data(Qt.ItemDataRole.UserRole)
-                if conn_data:
-                    self.display_network_details(conn_data)
+        if current.isValid():
+            conn_data = self.network_model.connection_at(current.row())
+            if conn_data:
+                self.display_network_details(conn_data)
 
     def display_network_details(self, connection_data):
         """Display details of the selected network."""
         self.current_connection = connection_data
         ssid = connection_data['ssid']
-        password = connection_data['password']
         
         details_text = f"<b>SSID:</b> {ssid}<br>"
-        # Mask password for display
-        masked_password = '*' * len(password) if password else "(None)"
-        details_text += f"<b>Password:</b> {masked_password}<br>"
-        details_text += f"<b>Security:</b> {'WPA/WPA2' if password else 'Open'}<br>"
+        details_text += f"<b>Password:</b> {connection_data['masked_password']}<br>"
+        details_text += f"<b>Security:</b> {connection_data['security_label']}<br>"
         
         self.info_label.setText(details_text)
         self.info_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
@@ -179,11 +278,9 @@ class NetworkListView(QWidget):
         if selected_rows:
             # Re-display details for the currently selected network
             current_row = selected_rows[0].row()
-            item = self.network_table.item(current_row, 0)
-            if item:
-                conn_data = item.data(Qt.ItemDataRole.UserRole)
-                if conn_data:
-                    self.display_network_details(conn_data)
+            conn_data = self.network_model.connection_at(current_row)
+            if conn_data:
+                self.display_network_details(conn_data)
         else:
             # No selection, show default message
             self.info_label.setText("Select a network to view details.")
@@ -203,11 +300,9 @@ class NetworkListView(QWidget):
         selected_rows = self.network_table.selectionModel().selectedRows()
         if selected_rows:
             current_row = selected_rows[0].row()
-            item = self.network_table.item(current_row, 0)
-            if item:
-                conn_data = item.data(Qt.ItemDataRole.UserRole)
-                if conn_data:
-                    self.copy_password(conn_data)
+            conn_data = self.network_model.connection_at(current_row)
+            if conn_data:
+                self.copy_password(conn_data)
 
     def copy_password(self, connection_data):
         """Copy a password to the clipboard."""
@@ -230,82 +325,90 @@ class NetworkListView(QWidget):
         selected_rows = self.network_table.selectionModel().selectedRows()
         if selected_rows:
             current_row = selected_rows[0].row()
-            item = self.network_table.item(current_row, 0)
-            if item:
-                conn_data = item.data(Qt.ItemDataRole.UserRole)
-                if conn_data:
-                    self.generate_qr_code(conn_data)
+            conn_data = self.network_model.connection_at(current_row)
+            if conn_data:
+                self.generate_qr_code(conn_data)
 
     def generate_qr_code(self, connection_data):
         """Generate a QR code for a given network and display it."""
+        # Imported here so OpenCV/zxing-cpp/qrcode load on first use rather than at startup
+        from qr_handler import QRHandler
         ssid = connection_data['ssid']
         password = connection_data['password']
-        # Assume WPA/WPA2 if there's a password, otherwise open
-        security = "WPA" if password else "nopass" 
+        security = connection_data['security']
         
-        qr_image = QRHandler.generate_wifi_qr_code(ssid, password, security)
-        if qr_image:
-            self.current_qr_image = qr_image # Store for saving
-            self.display_qr(qr_image, ssid)
+        # The payload is built once, for both the QR code and "Save QR String..."
+        wifi_string = QRHandler.build_wifi_string(ssid, password, security)
+
+        # Reuse the pixmap if this network's QR code was generated recently.
+        # It is rendered straight to a QPixmap, the PIL image is only built when saving
+        cache_key = (ssid, password, security)
+        qr_pixmap = self._cache_lookup(self._qr_cache, cache_key)
+        if qr_pixmap is None:
+            qr_pixmap = QRHandler.generate_wifi_qr_qpixmap(ssid, password, security, wifi_string=wifi_string)
+            if qr_pixmap:
+                self._cache_store(self._qr_cache, cache_key, qr_pixmap)
+
+        if qr_pixmap:
+            self.current_qr_pixmap = qr_pixmap
+            self.current_connection = connection_data # Names the saved files after this network
+            self.current_wifi_string = wifi_string # Store for saving
+            self.display_qr(qr_pixmap, ssid, cache_key)
             # Emit signal
-            self.qr_generated.emit(qr_image)
+            self.qr_generated.emit(qr_pixmap)
         else:
             main_window = self.window()
             if hasattr(main_window, 'status_bar'):
                 main_window.status_bar.showMessage("Failed to generate QR code.", 5000)
 
-    def display_qr(self, qr_image, ssid):
-        """Display the QR code image in the QLabel."""
+    def display_qr(self, qr_pixmap, ssid, cache_key=None):
+        """Display the QR code pixmap in the QLabel."""
         try:
-            # Convert PIL Image to QPixmap
-            qimage = self._pil_image_to_qimage(qr_image)
-            if qimage:
-                pixmap = QPixmap.fromImage(qimage)
-                # Scale pixmap to fit the label, keeping aspect ratio
-                scaled_pixmap = pixmap.scaled(self.qr_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                self.qr_label.setPixmap(scaled_pixmap)
-                
-                self.qr_label.show()
-                self.info_label.hide() # Hide details text
-                self.copy_password_button.hide()
-                self.generate_qr_button.hide()
-                self.save_qr_button.show()
-                self.save_qr_string_button.show()
-                self.back_to_details_button.show()
-                
-                self.info_label.setText(f"QR Code for <b>{ssid}</b>")
-            else:
-                raise Exception("Failed to convert PIL image to QImage.")
+            # The scaled pixmap only depends on the QR contents and the label size
+            label_size = self.qr_label.size()
+            pixmap_key = (cache_key, label_size.width(), label_size.height()) if cache_key else None
+            scaled_pixmap = self._cache_lookup(self._qr_pixmap_cache, pixmap_key) if pixmap_key else None
+            if scaled_pixmap is None:
+                # Scale pixmap to fit the label, keeping aspect ratio.
+                # Nearest-neighbour keeps the module edges sharp and is cheaper than smoothing
+                scaled_pixmap = qr_pixmap.scaled(label_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)
+                if pixmap_key:
+                    self._cache_store(self._qr_pixmap_cache, pixmap_key, scaled_pixmap)
+
+            self.qr_label.setPixmap(scaled_pixmap)
+            
+            self.qr_label.show()
+            self.info_label.hide() # Hide details text
+            self.copy_password_button.hide()
+            self.generate_qr_button.hide()
+            self.save_qr_button.show()
+            self.save_qr_string_button.show()
+            self.back_to_details_button.show()
+            
+            self.info_label.setText(f"QR Code for <b>{ssid}</b>")
         except Exception as e:
             print(f"Error displaying QR code: {e}")
             main_window = self.window()
             if hasattr(main_window, 'status_bar'):
                 main_window.status_bar.showMessage("Error displaying QR code.", 5000)
 
-    def _pil_image_to_qimage(self, pil_image):
-        """Convert a PIL Image to a QImage."""
-        try:
-            # Ensure image is in RGB mode
-            if pil_image.mode != "RGB":
-                pil_image = pil_image.convert("RGB")
-            
-            # Save PIL image to a bytes buffer
-            buf = io.BytesIO()
-            pil_image.save(buf, format='PNG') # Use PNG for lossless
-            img_data = buf.getvalue()
-            buf.close()
-            
-            # Create QImage from bytes
-            qimage = QImage()
-            qimage.loadFromData(img_data)
-            return qimage
-        except Exception as e:
-            print(f"Error converting PIL image to QImage: {e}")
-            return None
+    def _cache_lookup(self, cache, key):
+        """Return a cached value and mark it as most recently used, or None if it isn't cached."""
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    def _cache_store(self, cache, key, value):
+        """Store a value in a cache, evicting the least recently used entry when it is full."""
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self._QR_CACHE_SIZE:
+            cache.popitem(last=False)
 
     def save_current_qr_code(self):
         """Save the currently displayed QR code to a file."""
-        if not self.current_qr_image:
+        if not self.current_wifi_string:
             main_window = self.window()
             if hasattr(main_window, 'status_bar'):
                 main_window.status_bar.showMessage("No QR code to save.", 3000)
@@ -318,8 +421,16 @@ class NetworkListView(QWidget):
         
         if file_path:
             try:
-                # Save the PIL image directly
-                self.current_qr_image.save(file_path, 'PNG')
+                from qr_handler import QRHandler
+                # The display only needs the pixmap, so the PIL image is built here, on demand
+                qr_image = QRHandler.generate_wifi_qr_code(None, None, wifi_string=self.current_wifi_string)
+                if qr_image is None:
+                    raise Exception("Failed to generate QR code image.")
+                # Encode in memory and write the file in one go. Fast zlib level: the QR raster
+                # is mostly uniform runs, so higher levels barely shrink it
+                buf = io.BytesIO()
+                qr_image.save(buf, 'PNG', optimize=False, compress_level=1)
+                Path(file_path).write_bytes(buf.getvalue())
                 main_window = self.window()
                 if hasattr(main_window, 'status_bar'):
                     main_window.status_bar.showMessage(f"QR code saved to {file_path}", 5000)
@@ -331,21 +442,13 @@ class NetworkListView(QWidget):
 
     def save_qr_string_to_file(self):
         """Save the QR code string to a text file."""
-        if not self.current_connection:
+        if not self.current_wifi_string:
             main_window = self.window()
             if hasattr(main_window, 'status_bar'):
-                main_window.status_bar.showMessage("No network selected.", 3000)
+                main_window.status_bar.showMessage("No QR code to save.", 3000)
             return
 
         ssid = self.current_connection['ssid']
-        password = self.current_connection['password']
-        security = "WPA" if password else "nopass"
-
-        # Construct the WiFi string
-        if security.upper() == "NOPASS":
-            wifi_string = f"WIFI:T:nopass;S:{ssid};;"
-        else:
-            wifi_string = f"WIFI:T:{security};S:{ssid};P:{password};;"
 
         from PyQt6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getSaveFileName(
@@ -354,8 +457,7 @@ class NetworkListView(QWidget):
         
         if file_path:
             try:
-                with open(file_path, 'w') as f:
-                    f.write(wifi_string)
+                Path(file_path).write_text(self.current_wifi_string, encoding='utf-8')
                 main_window = self.window()
                 if hasattr(main_window, 'status_bar'):
                     main_window.status_bar.showMessage(f"QR string saved to {file_path}", 5000)
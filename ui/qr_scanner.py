@@ -1,9 +1,90 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QRadioButton, QLabel, QPushButton, QFileDialog, QStackedWidget
-from PyQt6.QtCore import pyqtSignal, QTimer, Qt
+from PyQt6.QtCore import pyqtSignal, QObject, QThread, QRunnable, QThreadPool, QMutex, QMutexLocker, Qt
 from PyQt6.QtGui import QPixmap, QImage
-import cv2
-import numpy as np
-from qr_handler import QRHandler
+import gc
+import os
+import sys
+
+class QRDecodeSignals(QObject):
+    """Signals for QRDecodeTask, QRunnable can't define signals itself."""
+    # Signal emitted when a decode finishes, with the task's token and the parsed Wi-Fi data or None
+    finished = pyqtSignal(object, object)
+
+class QRDecodeTask(QRunnable):
+    """
+    Runs one QR decode on the global thread pool, so the UI thread never waits on the decoder.
+    """
+    def __init__(self, decode, source, signals, token=None):
+        """
+        Args:
+            decode (callable): The QRHandler scan function to run.
+            source: The frame or image path passed to it.
+            signals (QRDecodeSignals): Where the result is reported.
+            token: Passed back with the result, so the receiver can tell which scan it belongs to.
+        """
+        super().__init__()
+        self.decode = decode
+        self.source = source
+        self.signals = signals
+        self.token = token
+
+    def run(self):
+        """Decode the source and report the result."""
+        qr_data = None
+        try:
+            qr_data = self.decode(self.source)
+        except Exception as e:
+            print(f"Error decoding QR code: {e}")
+        finally:
+            self.signals.finished.emit(self.token, qr_data)
+
+class CameraWorker(QObject):
+    """
+    Reads camera frames continuously on its own thread, keeping only the latest one.
+    Camera I/O never blocks the UI thread, and a slow frame never delays the preview.
+    """
+    # Signal emitted for every frame read, with the frame as a NumPy array
+    frame_ready = pyqtSignal(object)
+    # Signal emitted when the camera stops delivering frames
+    capture_failed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.cap = None # Set by the owner before the thread is started
+        self._running = False
+        self._lock = QMutex()
+        self._latest = None
+
+    def latest_frame(self):
+        """Return the most recently read frame."""
+        with QMutexLocker(self._lock):
+            return self._latest
+
+    def prepare(self, cap):
+        """
+        Set up the worker for a capture session. Called on the UI thread before the
+        thread starts, so a stop() issued right after start can't be lost.
+        """
+        self.cap = cap
+        self._running = True
+
+    def stop(self):
+        """Ask run() to return after the frame it is currently reading."""
+        self._running = False
+
+    def run(self):
+        """Read frames until stopped."""
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                if self._running:
+                    self.capture_failed.emit()
+                break
+            with QMutexLocker(self._lock):
+                self._latest = frame
+            self.frame_ready.emit(frame)
+        with QMutexLocker(self._lock):
+            self._latest = None
 
 class QRScannerView(QWidget):
     """
@@ -15,15 +96,40 @@ class QRScannerView(QWidget):
     # Signal emitted when the scan process is finished (e.g., user stops it)
     scan_finished = pyqtSignal()
 
+    # Only every Nth camera frame is decoded: consecutive frames are near-identical
+    _DECODE_EVERY = 6
+    # Frames are shrunk to at most this many pixels per side before decoding
+    _DECODE_MAX_DIM = 640
+
     def __init__(self):
         super().__init__()
         self.cap = None # OpenCV VideoCapture object
-        self.timer = QTimer() # Timer for camera feed updates
-        self.timer.timeout.connect(self.update_camera_frame)
+        # Frames are read on a separate thread and handed over through a queued connection
+        self.camera_thread = QThread(self)
+        self.camera_worker = CameraWorker()
+        self.camera_worker.moveToThread(self.camera_thread)
+        self.camera_thread.started.connect(self.camera_worker.run)
+        self.camera_worker.frame_ready.connect(self.update_camera_frame, Qt.ConnectionType.QueuedConnection)
+        self.camera_worker.capture_failed.connect(self.on_capture_failed, Qt.ConnectionType.QueuedConnection)
+        # Decoding runs on the thread pool; results come back to these through queued signals
+        self._camera_decode_signals = QRDecodeSignals(self)
+        self._camera_decode_signals.finished.connect(self.on_camera_decode_finished)
+        self._image_decode_signals = QRDecodeSignals(self)
+        self._image_decode_signals.finished.connect(self.on_image_decode_finished)
+        self._decode_busy = False # A camera frame is being decoded, don't start another
+        self._image_decode_busy = False # The loaded image is being decoded, keep its Scan button disabled
+        # Bumped for every camera session / loaded image. Decode results carry the value they
+        # were started with, and are dropped once it no longer matches
+        self._camera_generation = 0
+        self._image_generation = 0
         self.is_camera_active = False
         self.is_image_loaded = False
-        self.loaded_image = None
+        self.loaded_image = None # QPixmap of the loaded image, at most screen-sized, for the preview
+        self.loaded_image_path = None # Scanning decodes the file itself
         self.last_qr_data = None # To avoid re-processing the same QR code repeatedly from video
+        self._frame_counter = 0 # Camera frames displayed since the scan started
+        self._preview_buf = None # Reused destination for the resized preview image
+        self._cv2 = None # OpenCV module, bound by start_scan so the frame handlers don't import it
         
         self._setup_ui()
 
@@ -165,7 +271,12 @@ class QRScannerView(QWidget):
 
     def _check_camera(self):
         """Check if a camera is available."""
+        # On Linux a device node is enough: opening the camera just to probe it takes a
+        # noticeable moment and start_scan() opens it again anyway, handling failure there
+        if sys.platform.startswith('linux'):
+            return os.path.exists('/dev/video0')
         try:
+            import cv2
             cap = cv2.VideoCapture(0)
             if cap.isOpened():
                 cap.release()
@@ -199,57 +310,113 @@ class QRScannerView(QWidget):
             self.status_label.setText("No camera available.")
             return
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            self.status_label.setText("Error: Could not open camera.")
-            return
+        # OpenCV is only loaded once the scanner is actually used
+        import cv2
+        self._cv2 = cv2
+
+        # The capture stays open between scans (see stop_camera), only open it the first time
+        if self.cap is None or not self.cap.isOpened():
+            # On Linux use V4L2 directly, it honours the buffer size setting below
+            if sys.platform.startswith('linux'):
+                self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
+            else:
+                self.cap = cv2.VideoCapture(0)
+            if not self.cap.isOpened():
+                self.cap = None
+                self.status_label.setText("Error: Could not open camera.")
+                return
+
+            # Keep a single buffered frame so every read is the freshest one,
+            # and ask for a modest resolution: preview and QR decoding don't need more
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
         self.is_camera_active = True
         self.last_qr_data = None # Reset last scanned data
-        self.timer.start(30) # Update frame every 30 ms (approx. 33 FPS)
+        self._frame_counter = 0
+        self._camera_generation += 1
+        self._decode_busy = False # A decode left over from the previous session doesn't count
+        self.camera_worker.prepare(self.cap)
+        self.camera_thread.start()
         self.status_label.setText("Scanning... Please wait.")
         self.hide_scanned_actions()
 
-    def update_camera_frame(self):
-        """Capture and display a frame from the camera, and scan for QR codes."""
-        if not self.is_camera_active or self.cap is None:
-            return
-
-        ret, frame = self.cap.read()
-        if not ret:
-            self.status_label.setText("Error: Failed to grab frame from camera.")
-            self.stop_camera()
-            return
+    def update_camera_frame(self, frame):
+        """Display a frame from the camera, and scan it for QR codes."""
+        if not self.is_camera_active:
+            return # Frame queued before the camera was stopped
+        if frame is not self.camera_worker.latest_frame():
+            return # A newer frame has already been read, this one is stale
 
         # Display the frame
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
-        bytes_per_line = ch * w
-        q_img = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
-        # Scale pixmap to fit the label, keeping aspect ratio
-        scaled_pixmap = pixmap.scaled(self.camera_feed_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)
-        self.camera_feed_label.setPixmap(scaled_pixmap)
-
-        # Scan for QR codes in the frame
-        qr_data = QRHandler.scan_qr_from_frame(frame)
-        if qr_data and qr_data != self.last_qr_data: # Avoid re-processing the same code immediately
+        self._show_bgr_image(self.camera_feed_label, frame)
+
+        # Hand every Nth frame to the decoder, results come back through on_camera_decode_finished.
+        # Only one frame is decoded at a time: frames arriving meanwhile aren't decoded at all
+        self._frame_counter += 1
+        if self._frame_counter % self._DECODE_EVERY == 0 and not self._decode_busy:
+            # The decoder only needs a few pixels per module: give it a downscaled copy
+            # and keep the full-resolution frame for the preview
+            cv2 = self._cv2
+            h, w = frame.shape[:2]
+            scale = self._DECODE_MAX_DIM / max(h, w)
+            if scale < 1:
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            from qr_handler import QRHandler
+            self._decode_busy = True
+            QThreadPool.globalInstance().start(QRDecodeTask(QRHandler.scan_qr_from_frame, frame, self._camera_decode_signals, self._camera_generation))
+
+    def on_camera_decode_finished(self, generation, qr_data):
+        """Handle the result of decoding a camera frame."""
+        if generation != self._camera_generation:
+            return # Frame from an earlier scan session
+        self._decode_busy = False
+        if qr_data:
+            self.on_frame_qr_found(qr_data)
+
+    def on_frame_qr_found(self, qr_data):
+        """Handle a Wi-Fi QR code decoded from the camera feed."""
+        if not self.is_camera_active:
+            return # Result from a frame queued before the camera was stopped
+        if qr_data != self.last_qr_data: # Avoid re-processing the same code immediately
             self.last_qr_data = qr_data
             self.display_scanned_qr(qr_data)
-            self.timer.stop() # Stop continuous scanning once found
+            self._stop_capture() # Stop continuous scanning once found
+
+    def on_capture_failed(self):
+        """Handle the camera failing to deliver a frame."""
+        self.status_label.setText("Error: Failed to grab frame from camera.")
+        self.release_camera() # Reopen it from scratch next time
+
+    def _stop_capture(self):
+        """Stop the capture thread and wait until it no longer reads from the camera."""
+        if self.camera_thread.isRunning():
+            self.camera_worker.stop()
+            self.camera_thread.quit()
+            self.camera_thread.wait()
 
     def stop_camera(self):
-        """Stop the camera capture and timer."""
+        """
+        Stop capturing frames from the camera.
+
+        The camera itself stays open, so the next scan starts without re-initialising
+        the driver. release_camera() closes it.
+        """
         self.is_camera_active = False
-        if self.timer.isActive():
-            self.timer.stop()
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        self._stop_capture()
+        self._preview_buf = None # Release the preview buffer, it's reallocated on the next frame
         # Clear the feed label
         self.camera_feed_label.clear()
         self.camera_feed_label.setText("Camera stopped.")
 
+    def release_camera(self):
+        """Stop capturing and close the camera, e.g. when the application exits."""
+        self.stop_camera()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
     def load_image_file(self):
         """Open a file dialog to load an image."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -262,15 +429,27 @@ class QRScannerView(QWidget):
     def load_image(self, file_path):
         """Load an image from a file path."""
         try:
-            # Use OpenCV to load the image
-            image = cv2.imread(file_path)
-            if image is None:
+            # Qt decodes the file straight into a displayable pixmap; OpenCV only reads it
+            # (in grayscale) once the user actually scans it
+            image = QPixmap(file_path)
+            if image.isNull():
                 self.status_label.setText(f"Error: Could not load image from {file_path}")
                 return
                 
+            # Keep a copy no larger than the screen: the preview never needs more, and
+            # re-fitting it on every resize is then cheap even for a large photo
+            screen = self.screen()
+            if screen is not None:
+                bound = screen.availableGeometry().size()
+                if image.width() > bound.width() or image.height() > bound.height():
+                    image = image.scaled(bound, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
             self.loaded_image = image
+            self.loaded_image_path = file_path
             self.is_image_loaded = True
-            self.scan_image_button.setEnabled(True)
+            self._image_generation += 1
+            # If the previous image is still being scanned, on_image_decode_finished enables it
+            self.scan_image_button.setEnabled(not self._image_decode_busy)
             self.status_label.setText(f"Image loaded: {file_path}")
             
             # Display a thumbnail/preview
@@ -280,27 +459,58 @@ class QRScannerView(QWidget):
             self.status_label.setText(f"Error loading image: {e}")
 
     def display_image_preview(self, image):
-        """Display a preview of the loaded image."""
+        """Display a preview of the loaded image (a QPixmap), fitted to the preview label."""
         try:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            q_img = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-            # Scale pixmap to fit the label, keeping aspect ratio
-            scaled_pixmap = pixmap.scaled(self.image_preview_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)
-            self.image_preview_label.setPixmap(scaled_pixmap)
+            target = self.image_preview_label.contentsRect().size()
+            self.image_preview_label.setPixmap(image.scaled(target, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
         except Exception as e:
             self.status_label.setText(f"Error displaying image preview: {e}")
 
+    def _show_bgr_image(self, label, image):
+        """
+        Show a BGR camera frame in a label, fitted to the label while keeping its aspect ratio.
+
+        Qt reads the BGR bytes as they are, so the only pass over the pixels is the resize.
+        """
+        cv2 = self._cv2
+        target = label.contentsRect().size()
+        h, w = image.shape[:2]
+        scale = min(target.width() / w, target.height() / h)
+        tw, th = max(1, int(w * scale)), max(1, int(h * scale))
+        # Resize into the same buffer every time, only reallocating when the preview size changes
+        if self._preview_buf is None or self._preview_buf.shape[:2] != (th, tw):
+            import numpy as np
+            self._preview_buf = np.empty((th, tw, 3), dtype=np.uint8)
+        small = cv2.resize(image, (tw, th), dst=self._preview_buf, interpolation=cv2.INTER_AREA)
+        q_img = QImage(small.data, tw, th, small.strides[0], QImage.Format.Format_BGR888)
+        label.setPixmap(QPixmap.fromImage(q_img))
+
+    def resizeEvent(self, event):
+        """Re-fit the image preview to the new label size."""
+        super().resizeEvent(event)
+        # Previews are rendered at the label's size, so a still image needs re-rendering.
+        # The camera feed catches up with the next frame on its own
+        if self.is_image_loaded and self.loaded_image is not None:
+            self.display_image_preview(self.loaded_image)
+
     def scan_loaded_image(self):
         """Scan the loaded image for a QR code."""
-        if not self.is_image_loaded or self.loaded_image is None:
+        if not self.is_image_loaded or self.loaded_image_path is None:
             self.status_label.setText("No image loaded to scan.")
             return
             
         self.status_label.setText("Scanning loaded image...")
-        qr_data = QRHandler.scan_qr_from_image_data(self.loaded_image)
+        self.scan_image_button.setEnabled(False) # One scan at a time
+        self._image_decode_busy = True
+        from qr_handler import QRHandler
+        QThreadPool.globalInstance().start(QRDecodeTask(QRHandler.scan_qr_from_image, self.loaded_image_path, self._image_decode_signals, self._image_generation))
+
+    def on_image_decode_finished(self, generation, qr_data):
+        """Handle the result of scanning the loaded image."""
+        self._image_decode_busy = False
+        self.scan_image_button.setEnabled(self.is_image_loaded)
+        if generation != self._image_generation:
+            return # The image was replaced or reset while it was being scanned
         if qr_data:
             self.display_scanned_qr(qr_data)
         else:
@@ -309,8 +519,11 @@ class QRScannerView(QWidget):
 
     def reset_image_view(self):
         """Reset the image loading view."""
+        del self.loaded_image # Drop the (possibly multi-MB) image right away
         self.loaded_image = None
+        self.loaded_image_path = None
         self.is_image_loaded = False
+        self._image_generation += 1
         self.scan_image_button.setEnabled(False)
         self.image_preview_label.clear()
         self.image_preview_label.setText("No image loaded.")
@@ -360,4 +573,5 @@ class QRScannerView(QWidget):
         """Stop any active scan and signal to return to the main view."""
         self.stop_camera()
         self.reset_image_view() # Also reset image state
+        gc.collect() # Reclaim the large image/frame buffers released above
         self.scan_finished.emit()
\ No newline at end of file
@@ -1,77 +1,241 @@
 import subprocess
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 class WifiManager:
     """
     Handles interactions with NetworkManager using nmcli.
+    Saved connections are read over D-Bus when dbus-next is installed.
     """
+    # Field prefixes in nmcli's terse output, values are sliced off after them.
+    # nmcli output is handled as bytes and only decoded once a value is extracted
+    _SSID_PREFIX = b'802-11-wireless.ssid:'
+    _PSK_PREFIX = b'802-11-wireless-security.psk:'
+    # Concurrent nmcli processes when reading saved connections
+    _NMCLI_WORKERS = 8
 
     @staticmethod
     def get_saved_connections():
         """
         Retrieves a list of saved Wi-Fi connections and their passwords.
 
+        NetworkManager is queried over D-Bus when possible, falling back to nmcli.
+
         Returns:
             list: A list of dictionaries, each containing 'name', 'ssid', 'password'.
                   Returns an empty list on failure.
         """
+        connections = WifiManager._get_saved_connections_dbus()
+        if connections is None:
+            connections = WifiManager._get_saved_connections_nmcli()
+            if connections is None:
+                return []
+        return connections
+
+    @staticmethod
+    def _get_saved_connections_dbus():
+        """
+        Retrieves the saved Wi-Fi connections from NetworkManager over D-Bus.
+
+        Returns:
+            list: Same format as get_saved_connections(), or None if dbus-next isn't
+                  installed or the query failed.
+        """
         try:
-            # Get list of connection names and types
-            result = subprocess.run(
-                ['nmcli', '-t', '-f', 'NAME,TYPE', 'connection', 'show'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            connections = []
-            for line in result.stdout.strip().split('\n'):
-                if line: # Skip empty lines
-                    parts = line.split(':')
-                    if len(parts) >= 2 and parts[1] == '802-11-wireless': # Check if type is Wi-Fi
-                        conn_name = parts[0]
-                        # Get SSID and password for the Wi-Fi connection
-                        ssid_result = subprocess.run(
-                            ['nmcli', '-s', '-t', '-f', '802-11-wireless.ssid', 'connection', 'show', conn_name],
-                            capture_output=True,
-                            text=True,
-                            check=True
-                        )
-                        # The output format is '802-11-wireless.ssid:<SSID>'
-                        ssid_line = ssid_result.stdout.strip()
-                        if ssid_line.startswith('802-11-wireless.ssid:'):
-                            ssid = ssid_line.split(':', 1)[1]
-                        else:
-                            # If ssid field is empty, use the connection name
-                            ssid = conn_name
-                        
-                        # Get password
-                        passwd_result = subprocess.run(
-                            ['nmcli', '-s', '-t', '-f', '802-11-wireless-security.psk', 'connection', 'show', conn_name],
-                            capture_output=True,
-                            text=True,
-                            check=True
-                        )
-                        # The output format is '802-11-wireless-security.psk:<PASSWORD>'
-                        passwd_line = passwd_result.stdout.strip()
-                        if passwd_line.startswith('802-11-wireless-security.psk:'):
-                            password = passwd_line.split(':', 1)[1]
-                        else:
-                            password = '' # No password or not WPA/WPA2
-
-                        connections.append({
-                            'name': conn_name,
-                            'ssid': ssid,
-                            'password': password
-                        })
+            import asyncio
+            import dbus_next # Only checking that it is installed
+        except ImportError:
+            return None
+
+        try:
+            return asyncio.run(WifiManager._fetch_connections_dbus())
+        except Exception as e:
+            print(f'Error retrieving connections over D-Bus, falling back to nmcli: {e}')
+            return None
+
+    @staticmethod
+    async def _dbus_call(bus, path, interface, member, signature='', body=None):
+        """Call a NetworkManager D-Bus method and return its reply body."""
+        from dbus_next import Message, MessageType
+        reply = await bus.call(Message(
+            destination='org.freedesktop.NetworkManager',
+            path=path,
+            interface=interface,
+            member=member,
+            signature=signature,
+            body=body or []
+        ))
+        if reply.message_type == MessageType.ERROR:
+            raise Exception(f'{reply.error_name}: {reply.body[0] if reply.body else ""}')
+        return reply.body
+
+    @staticmethod
+    async def _fetch_connections_dbus():
+        """Lists all saved connections and fetches the Wi-Fi ones concurrently."""
+        import asyncio
+        from dbus_next import BusType
+        from dbus_next.aio import MessageBus
+
+        connection_iface = 'org.freedesktop.NetworkManager.Settings.Connection'
+
+        async def fetch_one(path):
+            settings = (await WifiManager._dbus_call(bus, path, connection_iface, 'GetSettings'))[0]
+            if settings['connection']['type'].value != '802-11-wireless':
+                return None
+            conn_name = settings['connection']['id'].value
+
+            ssid_variant = settings.get('802-11-wireless', {}).get('ssid')
+            ssid = ssid_variant.value.decode('utf-8', errors='replace') if ssid_variant else ''
+            if not ssid:
+                # If ssid field is empty, use the connection name
+                ssid = conn_name
+
+            password = '' # No password or not WPA/WPA2
+            if '802-11-wireless-security' in settings:
+                try:
+                    secrets = (await WifiManager._dbus_call(
+                        bus, path, connection_iface, 'GetSecrets', 's', ['802-11-wireless-security']
+                    ))[0]
+                    psk = secrets.get('802-11-wireless-security', {}).get('psk')
+                    if psk:
+                        password = psk.value
+                except Exception:
+                    pass # No stored secrets (e.g. agent-owned), same as an empty psk from nmcli
+
+            return {
+                'name': conn_name,
+                'ssid': ssid,
+                'password': password
+            }
+
+        bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+        try:
+            paths = (await WifiManager._dbus_call(
+                bus, '/org/freedesktop/NetworkManager/Settings',
+                'org.freedesktop.NetworkManager.Settings', 'ListConnections'
+            ))[0]
+            results = await asyncio.gather(*(fetch_one(path) for path in paths))
+            return [conn for conn in results if conn]
+        finally:
+            bus.disconnect()
+
+    @staticmethod
+    def _get_saved_connections_nmcli():
+        """
+        Retrieves the saved Wi-Fi connections by running nmcli.
+
+        Returns:
+            list: Same format as get_saved_connections(), or None on failure.
+        """
+        try:
+            wifi_names = WifiManager._list_wifi_connection_names()
+
+            # The per-connection nmcli calls are independent and mostly wait on NetworkManager,
+            # so run them concurrently. map() keeps the nmcli ordering
+            with ThreadPoolExecutor(max_workers=WifiManager._NMCLI_WORKERS) as executor:
+                connections = list(executor.map(WifiManager._fetch_one, wifi_names))
             
             return connections
         except subprocess.CalledProcessError as e:
             print(f'Error retrieving connections: {e}')
-            return []
+            return None
         except Exception as e:
             print(f'Unexpected error in get_saved_connections: {e}')
-            return []
+            return None
+
+    @staticmethod
+    def _unescape_terse(value):
+        """Undo nmcli's terse-mode escaping ('\\:' and '\\\\') of a bytes value and decode it."""
+        return re.sub(rb'\\(.)', rb'\1', value).decode('utf-8', 'replace')
+
+    @staticmethod
+    def _profile_exists(profile_name):
+        """
+        Checks whether a connection profile with exactly this name exists.
+
+        Args:
+            profile_name (str): The connection name.
+
+        Returns:
+            bool: True if the profile exists.
+
+        Raises:
+            subprocess.CalledProcessError: If nmcli fails.
+        """
+        result = subprocess.run(
+            ['nmcli', '-t', '-f', 'NAME', 'connection', 'show'],
+            capture_output=True,
+            check=True
+        )
+        return any(WifiManager._unescape_terse(line) == profile_name for line in result.stdout.splitlines())
+
+    @staticmethod
+    def _list_wifi_connection_names():
+        """
+        Lists the names of all saved Wi-Fi connections with nmcli.
+
+        Returns:
+            list: The connection names, in nmcli's order.
+
+        Raises:
+            subprocess.CalledProcessError: If nmcli fails.
+        """
+        # Get list of connection names and types
+        result = subprocess.run(
+            ['nmcli', '-t', '-f', 'NAME,TYPE', 'connection', 'show'],
+            capture_output=True,
+            check=True
+        )
+
+        names = []
+        for line in result.stdout.splitlines():
+            if line: # Skip empty lines
+                # The type never contains a colon, the name might (escaped as '\:' by nmcli)
+                name, _, conn_type = line.rpartition(b':')
+                if conn_type == b'802-11-wireless': # Check if type is Wi-Fi
+                    names.append(WifiManager._unescape_terse(name))
+        return names
+
+    @staticmethod
+    def _fetch_one(conn_name):
+        """
+        Retrieves the SSID and password of one saved Wi-Fi connection with nmcli.
+
+        Args:
+            conn_name (str): The connection name.
+
+        Returns:
+            dict: The connection's 'name', 'ssid' and 'password'.
+
+        Raises:
+            subprocess.CalledProcessError: If nmcli fails.
+        """
+        # Get SSID and password for the Wi-Fi connection in a single call
+        details_result = subprocess.run(
+            ['nmcli', '-s', '-t', '-f', '802-11-wireless.ssid,802-11-wireless-security.psk', 'connection', 'show', conn_name],
+            capture_output=True,
+            check=True
+        )
+        # One line per field: '802-11-wireless.ssid:<SSID>' and '802-11-wireless-security.psk:<PASSWORD>'
+        ssid = ''
+        password = '' # No password or not WPA/WPA2
+        ssid_len = len(WifiManager._SSID_PREFIX)
+        psk_len = len(WifiManager._PSK_PREFIX)
+        for detail_line in details_result.stdout.splitlines():
+            if detail_line[:ssid_len] == WifiManager._SSID_PREFIX:
+                ssid = detail_line[ssid_len:].decode('utf-8', 'replace')
+            elif detail_line[:psk_len] == WifiManager._PSK_PREFIX:
+                password = detail_line[psk_len:].decode('utf-8', 'replace')
+        if not ssid:
+            # If ssid field is empty, use the connection name
+            ssid = conn_name
+
+        return {
+            'name': conn_name,
+            'ssid': ssid,
+            'password': password
+        }
 
     @staticmethod
     def connect_to_network(ssid, password=''):
@@ -86,36 +250,17 @@ class WifiManager:
             tuple: (success: bool, message: str)
         """
         try:
-            # This is a simplified approach. A more robust one would involve creating a temporary profile.
-            # For now, we assume a profile already exists or we try to connect directly (which might not work).
-            # A better way is to create a temporary connection profile.
-            # Let's try connecting using the ssid directly if a profile exists.
-            # If not, this won't work. For a full implementation, creating a temporary profile is needed.
-            
-            # Check if a connection with this SSID already exists
-            existing_conns = WifiManager.get_saved_connections()
-            conn_name = None
-            for conn in existing_conns:
-                if conn['ssid'] == ssid:
-                    conn_name = conn['name']
-                    break
-            
-            if conn_name:
-                result = subprocess.run(
-                    ['nmcli', 'connection', 'up', conn_name],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    return True, f'Successfully connected to \'{ssid}\' using existing profile \'{conn_name}\'.'
-                else:
-                    return False, f'Failed to connect using existing profile \'{conn_name}\': {result.stderr}'
+            # nmcli finds the network by SSID itself: it reuses a matching saved profile,
+            # or creates one, so no lookup of saved connections is needed
+            cmd = ['nmcli', 'device', 'wifi', 'connect', ssid]
+            if password:
+                cmd.extend(['password', password])
+            result = subprocess.run(cmd, capture_output=True)
+
+            if result.returncode == 0:
+                return True, f'Successfully connected to \'{ssid}\'.'
             else:
-                # Attempt to create a temporary connection profile (this requires more details)
-                # This is a placeholder for a more complex implementation
-                # We'll just return a message indicating it's not fully implemented here
-                # and suggest using the 'Save Profile' feature first.
-                return False, f'No existing profile found for \'{ssid}\'. Please save the profile first.'
+                return False, f'Failed to connect to \'{ssid}\': {result.stderr.decode("utf-8", "replace")}'
                 
         except Exception as e:
             return False, f'Unexpected error in connect_to_network: {e}'
@@ -123,7 +268,10 @@ class WifiManager:
     @staticmethod
     def save_profile(ssid, password='', security='WPA'): # Default to WPA as it's common
         """
-        Saves a new Wi-Fi connection profile using nmcli.
+        Saves a Wi-Fi connection profile using nmcli.
+
+        If the profile already exists (e.g. the same QR code was scanned again) it is
+        updated instead of failing on the duplicate name.
 
         Args:
             ssid (str): The SSID of the network.
@@ -138,24 +286,36 @@ class WifiManager:
             # Use a unique name, e.g., 'Temp_WiFi_<SSID>' or just SSID if unique enough
             profile_name = f'WiFi_{ssid}'
             
-            cmd = ['nmcli', 'connection', 'add', 'type', 'wifi', 'con-name', profile_name, 'ssid', ssid]
+            exists = WifiManager._profile_exists(profile_name)
+            if exists:
+                cmd = ['nmcli', 'connection', 'modify', profile_name, '802-11-wireless.ssid', ssid]
+            else:
+                cmd = ['nmcli', 'connection', 'add', 'type', 'wifi', 'con-name', profile_name, 'ssid', ssid]
             
-            # Add security settings if password is provided
+            # Add security settings if password is provided. An existing profile may still
+            # hold the settings of its previous security type, so clear those as well
             if password:
                 if security.upper() == 'WPA':
                     cmd.extend(['wifi-sec.key-mgmt', 'wpa-psk', 'wifi-sec.psk', password])
+                    if exists:
+                        cmd.extend(['wifi-sec.wep-key0', ''])
                 elif security.upper() == 'WEP':
                     # Note: WEP is deprecated and less secure
                     cmd.extend(['wifi-sec.key-mgmt', 'none', 'wifi-sec.wep-key0', password])
+                    if exists:
+                        cmd.extend(['wifi-sec.psk', ''])
                 # Add other security types as needed
+            elif exists:
+                # Open network now: drop the security setting altogether
+                cmd.extend(['remove', '802-11-wireless-security'])
             
-            # Execute the command to create the profile
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            # Execute the command to create or update the profile
+            result = subprocess.run(cmd, capture_output=True)
             
             if result.returncode == 0:
                 return True, f'Profile \'{profile_name}\' for \'{ssid}\' saved successfully.'
             else:
-                return False, f'Failed to save profile: {result.stderr}'
+                return False, f'Failed to save profile: {result.stderr.decode("utf-8", "replace")}'
                 
         except Exception as e:
             return False, f'Unexpected error in save_profile: {e}'